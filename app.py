@@ -1,9 +1,13 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for
-from data_models import db, Author, Book
-from sqlalchemy import inspect
+import re
+import threading
+from cachetools import TTLCache
+from flask import Flask, g, has_request_context, jsonify, render_template, request, redirect, url_for
+from data_models import db, Author, Book, book_fts, create_search_index
+from sqlalchemy import delete, event, insert, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from datetime import datetime
+from datetime import date
 
 app = Flask(__name__)
 
@@ -14,17 +18,148 @@ base_dir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(base_dir, "data", "library.sqlite3")}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Engine options: a compiled-statement cache large enough to never evict the
+# handful of statements this app emits, and a pool of reusable connections.
+# check_same_thread=False lets pooled sqlite3 connections move between threads.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'query_cache_size': 1200,
+    'pool_size': 10,
+    'pool_pre_ping': True,
+    'connect_args': {'check_same_thread': False},
+}
+
 db.init_app(app)
 
-# Only run this block once to create the database tables.
+# Book lists rendered by home(), keyed by (sort_by, search). Entries hold plain
+# rows rather than ORM objects so they stay valid outside the session that
+# loaded them. Every write route clears the cache after committing.
+_HOME_CACHE = TTLCache(maxsize=128, ttl=60)
+
+# Leading year of a publication_year field: "1979" or "1979-05-01"
+_YEAR_RE = re.compile(r'\d{1,4}(?=-|$)')
+
+# (id, name) rows for the author dropdown on the add book form; cleared by
+# add_author after committing.
+_AUTHOR_CACHE = TTLCache(maxsize=1, ttl=300)
+
+# TTLCache is not thread-safe; every access to either cache holds this lock.
+# Database queries run outside it.
+_CACHE_LOCK = threading.Lock()
+
+
+def set_sqlite_pragmas(dbapi_conn, _connection_record):
+    """Tune every new SQLite connection for concurrent reads and writes.
+
+    WAL lets readers proceed while a writer commits, synchronous=NORMAL drops
+    the fsync per commit that WAL does not need, and busy_timeout makes
+    concurrent writers wait instead of failing with "database is locked".
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=10000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")  # 20MB page cache
+    cursor.close()
+
+
+# Requests issuing more SQL statements than this are logged in debug mode
+QUERY_COUNT_THRESHOLD = 3
+
+
+def count_query(*_args):
+    """Count the SQL statements executed while handling the current request."""
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def log_query_count(response):
+    """Warn about requests that issued more queries than expected, e.g. an N+1."""
+    query_count = g.get('query_count', 0)
+    if query_count > QUERY_COUNT_THRESHOLD:
+        app.logger.warning("%s %s issued %d SQL queries", request.method, request.path, query_count)
+    return response
+
+
 with app.app_context():
-    inspector = inspect(db.engine)
-    if not inspector.has_table("book"):  # replace with your table name
-        print("Creating tables...")
-        db.create_all()
-        print("Tables created.")
+    # Register before the first connection is opened so all of them are tuned
+    event.listen(db.engine, "connect", set_sqlite_pragmas)
+    # Enabled with FLASK_DEBUG=1
+    if app.debug:
+        event.listen(db.engine, "before_cursor_execute", count_query)
+        app.after_request(log_query_count)
+
+
+def init_db():
+    """Create missing tables, indexes and the search index.
+
+    Run once before serving, not at import time, so that several server
+    processes starting together do not race to create the schema.
+    """
+    with app.app_context():
+        inspector = inspect(db.engine)
+        if not inspector.has_table("book"):  # replace with your table name
+            print("Creating tables...")
+            db.create_all()
+            print("Tables created.")
+        else:
+            print("Tables already exist. Skipping.")
+            # Indexes added to the models after the tables were first created
+            for model in (Author, Book):
+                for index in model.__table__.indexes:
+                    index.create(db.engine, checkfirst=True)
+        create_search_index()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables and indexes."""
+    init_db()
+
+
+def fts_query(search):
+    """Turn free-form user input into a safe FTS5 MATCH expression.
+
+    Every token is double-quoted so characters such as '-' or ':' are not
+    parsed as FTS5 operators, and gets a trailing '*' for prefix matching.
+    """
+    tokens = search.split()
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def query_books(sort_by, search):
+    """Return the rows listed on the home page.
+
+    Only the columns the template renders are selected, so each result is a
+    lightweight Row (id, title, author_name, publication_year) rather than
+    Book and Author ORM instances.
+    """
+    columns = select(Book.id, Book.title, Author.name.label('author_name'), Book.publication_year)
+
+    # Search
+    if search and search.strip():
+        stmt = (
+            columns.join(book_fts, book_fts.c.rowid == Book.id)
+            .outerjoin(Author)
+            .where(text("book_fts MATCH :q").bindparams(q=fts_query(search)))
+            .order_by(book_fts.c.rank)
+        )
+        return db.session.execute(stmt).all()
+
+    # Sorting
+    books_query = columns.outerjoin(Author)
+    if sort_by == 'title':
+        stmt = books_query.order_by(Book.title)
+    elif sort_by == 'author':
+        stmt = columns.join(Author).order_by(Author.name)
+    elif sort_by == 'publication_year':
+        stmt = books_query.order_by(Book.publication_year)
+    elif sort_by == 'no_sort':
+        stmt = books_query
     else:
-        print("Tables already exist. Skipping.")
+        stmt = books_query  # Default case if no valid sort_by
+
+    return db.session.execute(stmt).all()
 
 
 @app.route('/', methods=['GET'])
@@ -36,24 +171,28 @@ def home():
     sort_by = request.args.get('sort_by', 'no_sort')
     search = request.args.get('search')
 
-    # Search
-    if search:
-        books = Book.query.filter(Book.title.like(f'%{search}%')).order_by(Book.title).all()
-        return render_template('home.html', books=books, success=bool(books))
+    key = (sort_by, search or '')
+    with _CACHE_LOCK:
+        books = _HOME_CACHE.get(key)
+    if books is None:
+        books = query_books(sort_by, search)
+        with _CACHE_LOCK:
+            _HOME_CACHE[key] = books
+
+    # A search without results shows the "No books were found" message
+    success = bool(books) if search and search.strip() else True
+    return render_template('home.html', books=books, success=success)
 
-    # Sorting
-    if sort_by == 'title':
-        books = Book.query.order_by(Book.title).all()
-    elif sort_by == 'author':
-        books = Book.query.join(Author).order_by(Author.name).all()
-    elif sort_by == 'publication_year':
-        books = Book.query.order_by(Book.publication_year).all()
-    elif sort_by == 'no_sort':
-        books = Book.query.all()
-    else:
-        books = Book.query.all()  # Default case if no valid sort_by
 
-    return render_template('home.html', books=books, success=True)
+def get_authors():
+    """Return (id, name) rows of all authors ordered by name, cached."""
+    with _CACHE_LOCK:
+        authors = _AUTHOR_CACHE.get('all')
+    if authors is None:
+        authors = db.session.execute(select(Author.id, Author.name).order_by(Author.name)).all()
+        with _CACHE_LOCK:
+            _AUTHOR_CACHE['all'] = authors
+    return authors
 
 
 @app.route('/add_author', methods=['GET', 'POST'])
@@ -70,17 +209,20 @@ def add_author():
         death_date_str = request.form.get('death_date').strip() # type: ignore
 
         # Always required
-        birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
+        birth_date = date.fromisoformat(birth_date_str)
 
         # Only parse if provided
         death_date = None
         if death_date_str:
-            death_date = datetime.strptime(death_date_str, "%Y-%m-%d").date()
+            death_date = date.fromisoformat(death_date_str)
 
         author = Author(name=author_name, birth_date=birth_date, death_date=death_date)
         try:
             db.session.add(author)
             db.session.commit()
+            with _CACHE_LOCK:
+                _HOME_CACHE.clear()
+                _AUTHOR_CACHE.clear()
             return redirect(url_for('add_author', success=True), 302)
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -111,46 +253,133 @@ def add_book():
         publication_year = None
         if publication_year_str:
             # Handle both "YYYY" and accidental "YYYY-MM-DD"
-            try:
-                if "-" in publication_year_str:
-                    publication_year = int(publication_year_str.split("-")[0])  # take first part
-                else:
-                    publication_year = int(publication_year_str)
-            except ValueError:
+            match = _YEAR_RE.match(publication_year_str)
+            if match:
+                publication_year = int(match.group())
+            else:
                 return render_template(
                     'add_book.html',
-                    authors=Author.query.all(),
+                    authors=get_authors(),
                     error=f"Invalid year format: {publication_year_str}"
-                )
-
-        # Check for duplicate ISBN
-        existing = Book.query.filter_by(isbn=isbn).first()
-        if existing:
-            return render_template(
-                'add_book.html',
-                authors=Author.query.all(),
-                error=f"A book with ISBN {isbn} already exists."
+                ), 400
+
+        # Insert unless the ISBN is taken; a single statement replaces the
+        # separate duplicate check. RETURNING yields no row on a conflict.
+        stmt = (
+            sqlite_insert(Book)
+            .values(
+                title=title,
+                author_id=author_id,
+                publication_year=publication_year,
+                isbn=isbn
             )
-
-        book = Book(
-            title=title,
-            author_id=author_id,
-            publication_year=publication_year,
-            isbn=isbn
+            .on_conflict_do_nothing(index_elements=['isbn'])
+            .returning(Book.id)
         )
         try:
-            db.session.add(book)
+            book_id = db.session.execute(stmt).scalar_one_or_none()
+            if book_id is None:
+                db.session.rollback()
+                return render_template(
+                    'add_book.html',
+                    authors=get_authors(),
+                    error=f"A book with ISBN {isbn} already exists."
+                ), 400
             db.session.commit()
+            with _CACHE_LOCK:
+                _HOME_CACHE.clear()
             return redirect(url_for('add_book', success=True), 302)
+        except IntegrityError as e:
+            # e.g. the publication_year CHECK constraint
+            db.session.rollback()
+            return render_template(
+                'add_book.html',
+                authors=get_authors(),
+                error=f"Invalid book: {e.orig}"
+            ), 400
         except SQLAlchemyError as e:
             db.session.rollback()
             return render_template(
                 'add_book.html',
+                authors=get_authors(),
                 error=f"Database error: {str(e)}"
             )
 
-    authors = Author.query.all()
-    return render_template('add_book.html', authors=authors)
+    return render_template('add_book.html', authors=get_authors())
+
+
+def parse_bulk_book(item):
+    """Validate one object of an /add_books_bulk payload.
+
+    Returns (row, None) with the values to insert, or (None, error) naming
+    the first invalid field. Checks match the add book form: title and ISBN
+    are required non-empty strings and the year, if given, is 0-9999.
+    """
+    if not isinstance(item, dict):
+        return None, "is not an object"
+
+    row = {}
+    for field in ('title', 'isbn'):
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None, f"needs a non-empty string {field}"
+        row[field] = value.strip()
+
+    # bool is a subclass of int, so true/false must be rejected explicitly
+    author_id = item.get('author_id')
+    if not isinstance(author_id, int) or isinstance(author_id, bool):
+        return None, "needs an integer author_id"
+    row['author_id'] = author_id
+
+    publication_year = item.get('publication_year')
+    if publication_year is not None:
+        if (not isinstance(publication_year, int) or isinstance(publication_year, bool)
+                or not 0 <= publication_year <= 9999):
+            return None, "has a publication_year that is not an integer from 0 to 9999"
+    row['publication_year'] = publication_year
+
+    return row, None
+
+
+@app.route('/add_books_bulk', methods=['POST'])
+def add_books_bulk():
+    """ Add many books from a JSON array in a single transaction. """
+    # Expects a list of objects with title, author_id, isbn and an optional
+    # publication_year. All rows are sent as one executemany INSERT and
+    # committed together; if any row fails, none are added.
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        return jsonify(error="Expected a non-empty JSON array of books."), 400
+
+    rows = []
+    for index, item in enumerate(data):
+        row, error = parse_bulk_book(item)
+        if error:
+            return jsonify(error=f"Book {index} {error}."), 400
+        rows.append(row)
+
+    try:
+        # SQLite does not enforce the author foreign key, so check it here,
+        # in the same transaction as the INSERT
+        author_ids = {row['author_id'] for row in rows}
+        found = set(db.session.scalars(select(Author.id).where(Author.id.in_(author_ids))))
+        missing = sorted(author_ids - found)
+        if missing:
+            db.session.rollback()
+            return jsonify(error=f"Unknown author_id: {', '.join(map(str, missing))}."), 400
+
+        db.session.execute(insert(Book), rows)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify(error=f"Books not added: {e.orig}"), 409
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify(error=f"Database error: {str(e)}"), 500
+
+    with _CACHE_LOCK:
+        _HOME_CACHE.clear()
+    return jsonify(added=len(rows)), 201
 
 
 @app.route('/book/<int:book_id>/delete', methods=['POST'])
@@ -158,15 +387,15 @@ def delete_book(book_id):
     """ Deletes a book identified by the book_id parameter. """
     #Redirects to the home page after the book is deleted.
 
-    book = Book.query.get(book_id)
-
-    if not book:
-        # Book not found
-        return redirect(url_for('home', error="Book not found"), 302)
-
     try:
-        db.session.delete(book)
+        # A single DELETE; no need to load the Book first
+        result = db.session.execute(delete(Book).where(Book.id == book_id))
         db.session.commit()
+        if result.rowcount == 0:
+            # Book not found
+            return redirect(url_for('home', error="Book not found"), 302)
+        with _CACHE_LOCK:
+            _HOME_CACHE.clear()
         return redirect(url_for('home', success_delete=True), 302)
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -174,4 +403,8 @@ def delete_book(book_id):
 
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5002, debug=True)
+    init_db()
+    # Development server only; in production run `gunicorn app:app`,
+    # configured by gunicorn.conf.py. Debug mode, and with it the query count
+    # logging, is off unless FLASK_DEBUG=1 is set.
+    app.run(host="0.0.0.0", port=5002, debug=app.debug)
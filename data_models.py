@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import column, table, text
 from sqlalchemy.orm import DeclarativeBase
 from datetime import date
 
@@ -19,10 +20,10 @@ class Author(db.Model):
         books (relationship): Collection of books written by the author.
     """
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String, nullable=False)
+    name = db.Column(db.String, nullable=False, index=True)
     birth_date = db.Column(db.Date, nullable=False)
     death_date = db.Column(db.Date)
-    books = db.relationship('Book', backref='author', lazy=True)
+    books = db.relationship('Book', backref=db.backref('author', lazy='joined'), lazy=True)
 
     def __repr__(self):
         return f"Author(id={self.id}, name={self.name})"
@@ -40,14 +41,19 @@ class Book(db.Model):
         id (int): Primary key, auto-incremented identifier for the book.
         author_id (int): Foreign key linking to the author of the book.
         title (str): Title of the book.
-        publication_year (str): Year of publication of the book (optional).
-        isbn (int): ISBN number of the book.
+        publication_year (int): Year of publication of the book (optional).
+        isbn (str): ISBN number of the book, unique across all books.
     """
+    __table_args__ = (
+        db.CheckConstraint('publication_year BETWEEN 0 AND 9999', name='ck_book_publication_year'),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    author_id = db.Column(db.Integer, db.ForeignKey('author.id'))
-    title = db.Column(db.String, nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), index=True)
+    title = db.Column(db.String, nullable=False, index=True)
     publication_year = db.Column(db.Integer)
-    isbn = db.Column(db.String, unique=True, nullable=False)  # enforce uniqueness
+    # enforce uniqueness; SQLite backs the UNIQUE constraint with its own index
+    isbn = db.Column(db.String, unique=True, nullable=False)
 
     def __repr__(self):
         """Return a string representation of the book for debugging."""
@@ -60,3 +66,37 @@ class Book(db.Model):
             return f"{self.id}. {self.title} ({pub_year})"
         else:
             return f"{self.id}. {self.title}"
+
+
+# Full-text index over book titles. It is an external-content FTS5 table, so
+# it only stores the inverted index and the triggers keep it in sync with book.
+BOOK_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts "
+    "USING fts5(title, content='book', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS book_ai AFTER INSERT ON book BEGIN "
+    "INSERT INTO book_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS book_ad AFTER DELETE ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title) VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS book_au AFTER UPDATE ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    "INSERT INTO book_fts(rowid, title) VALUES (new.id, new.title); END",
+)
+
+# Lightweight handle on book_fts for use in select() statements
+book_fts = table('book_fts', column('rowid'), column('title'), column('rank'))
+
+
+def create_search_index():
+    """Create the book_fts search index and its sync triggers if missing.
+
+    When the index is created for an existing database it is rebuilt from
+    the rows already in the book table.
+    """
+    with db.engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_fts'")
+        ).first()
+        for statement in BOOK_FTS_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO book_fts(book_fts) VALUES ('rebuild')"))
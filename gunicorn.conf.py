@@ -0,0 +1,8 @@
+# Production server settings, picked up by `gunicorn app:app`.
+# A single gevent worker serves many concurrent requests, sharing the
+# SQLAlchemy connection pool configured in app.py. Keep it to one process:
+# the home page and author caches in app.py are per process, and a second
+# worker would keep serving stale entries after another one's writes.
+bind = "0.0.0.0:5002"
+workers = 1
+worker_class = "gevent"